@@ -13,9 +13,13 @@ export type ComponentTemplate = {
 };
 
 export type RuleCriterion = {
-    field: string;
-    operator: 'equals' | 'not_equals' | 'contains' | 'missing' | 'exists';
+    field?: string; // omitted for 'any' / 'all' / 'not' groups
+    operator:
+        | 'equals' | 'not_equals' | 'contains' | 'not_contains' | 'missing' | 'exists'
+        | 'in' | 'not_in' | 'matches' | 'gt' | 'lt' | 'gte' | 'lte'
+        | 'any' | 'all' | 'not';
     value?: any;
+    criteria?: RuleCriterion[];
 };
 
 export type RuleTemplate = {
@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.domain.otm.schema import OTMProject
+from app.domain.analysis.schema import AnalysisReport
+
+logger = logging.getLogger(__name__)
+
+# Relative store paths are resolved against server/, not the process working directory
+SERVER_DIR = Path(__file__).resolve().parents[2]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    project_id TEXT NOT NULL,
+    revision   INTEGER NOT NULL,
+    name       TEXT NOT NULL,
+    otm_json   TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (project_id, revision)
+);
+CREATE TABLE IF NOT EXISTS reports (
+    project_id  TEXT NOT NULL,
+    revision    INTEGER NOT NULL,
+    rules_key   TEXT NOT NULL,
+    report_json TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    PRIMARY KEY (project_id, revision, rules_key)
+);
+"""
+
+
+class ProjectStore:
+    """
+    SQLite-backed store for OTM projects (by projectId and revision) and their analysis reports.
+    Reports are keyed by a fingerprint of the rule set used, so a stored report is only
+    reused for the same revision and the same custom rules.
+    """
+
+    def __init__(self, db_path: str = None):
+        path = Path(db_path or settings.PROJECT_STORE_PATH)
+        self.db_path = str(path if path.is_absolute() else SERVER_DIR / path)
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    # --- Projects ---
+
+    def save_project(self, project: OTMProject) -> int:
+        """Stores `project` as a new revision and returns the revision number."""
+        project_id = project.project.get("id")
+        if not project_id:
+            raise ValueError("OTM project has no 'id'")
+        otm_json = project.model_dump_json(by_alias=True)
+
+        with self._connect() as conn:
+            # Take the write lock up front so concurrent saves get distinct revisions
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT COALESCE(MAX(revision), 0) FROM projects WHERE project_id = ?", (project_id,)
+            ).fetchone()
+            revision = row[0] + 1
+            conn.execute(
+                "INSERT INTO projects (project_id, revision, name, otm_json, created_at) VALUES (?, ?, ?, ?, ?)",
+                (project_id, revision, project.project.get("name", ""), otm_json, datetime.utcnow().isoformat())
+            )
+        logger.info(f"Stored project {project_id} revision {revision}")
+        return revision
+
+    def get_project(self, project_id: str, revision: Optional[int] = None) -> Optional[Tuple[int, OTMProject]]:
+        """Returns (revision, project) for the given or latest revision, or None if not stored."""
+        with self._connect() as conn:
+            if revision is None:
+                row = conn.execute(
+                    "SELECT revision, otm_json FROM projects WHERE project_id = ? ORDER BY revision DESC LIMIT 1",
+                    (project_id,)
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT revision, otm_json FROM projects WHERE project_id = ? AND revision = ?",
+                    (project_id, revision)
+                ).fetchone()
+        if row is None:
+            return None
+        return row[0], OTMProject.model_validate_json(row[1])
+
+    def latest_revision(self, project_id: str) -> Optional[int]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(revision) FROM projects WHERE project_id = ?", (project_id,)
+            ).fetchone()
+        return row[0]
+
+    # --- Reports ---
+
+    def save_report(self, project_id: str, revision: int, report: AnalysisReport, rules_key: str = "") -> str:
+        """Stores (or replaces) the report for a revision and rule set; returns the stored JSON."""
+        report_json = report.model_dump_json()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO reports (project_id, revision, rules_key, report_json, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (project_id, revision, rules_key, report_json, datetime.utcnow().isoformat())
+            )
+        return report_json
+
+    def get_report_json(self, project_id: str, revision: int, rules_key: Optional[str] = None,
+                        key_prefix: str = "") -> Optional[str]:
+        """
+        Returns the stored report JSON for a revision.
+        With `rules_key=None` the most recently stored report for that revision whose
+        rules key starts with `key_prefix` is returned.
+        """
+        with self._connect() as conn:
+            if rules_key is None:
+                row = conn.execute(
+                    "SELECT report_json FROM reports WHERE project_id = ? AND revision = ? "
+                    "AND substr(rules_key, 1, ?) = ? ORDER BY created_at DESC LIMIT 1",
+                    (project_id, revision, len(key_prefix), key_prefix)
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT report_json FROM reports WHERE project_id = ? AND revision = ? AND rules_key = ?",
+                    (project_id, revision, rules_key)
+                ).fetchone()
+        return row[0] if row else None
+
+
+@lru_cache(maxsize=None)
+def get_project_store() -> ProjectStore:
+    """Shared ProjectStore, created (with its database file) on first use"""
+    return ProjectStore()
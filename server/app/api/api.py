@@ -1,5 +1,7 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import diagrams
+from app.api.v1.endpoints import diagrams, projects, templates
 
 api_router = APIRouter()
 api_router.include_router(diagrams.router, prefix="/diagrams", tags=["diagrams"])
+api_router.include_router(projects.router, prefix="/projects", tags=["projects"])
+api_router.include_router(templates.router, prefix="/templates", tags=["templates"])
@@ -0,0 +1,42 @@
+from typing import Any, Dict, Type
+from fastapi import FastAPI
+from fastapi.openapi.utils import get_openapi
+from pydantic import BaseModel
+
+# --- OpenAPI for streamed request bodies ---
+# Endpoints that read the raw Request (to stream / decompress uploads) lose their
+# body schema. `streamed_body` restores it via openapi_extra, and
+# `install_openapi` registers the referenced models under components/schemas.
+
+_STREAMED_BODY_MODELS: Dict[str, Type[BaseModel]] = {}
+
+
+def streamed_body(model: Type[BaseModel]) -> Dict[str, Any]:
+    """openapi_extra documenting `model` as the JSON request body (gzip / zstd accepted)"""
+    _STREAMED_BODY_MODELS[model.__name__] = model
+    return {
+        "requestBody": {
+            "required": True,
+            "description": "JSON body; may be sent with Content-Encoding gzip or zstd.",
+            "content": {
+                "application/json": {"schema": {"$ref": f"#/components/schemas/{model.__name__}"}}
+            },
+        }
+    }
+
+
+def install_openapi(app: FastAPI) -> None:
+    def custom_openapi():
+        if app.openapi_schema:
+            return app.openapi_schema
+        schema = get_openapi(title=app.title, version=app.version, routes=app.routes)
+        components = schema.setdefault("components", {}).setdefault("schemas", {})
+        for name, model in _STREAMED_BODY_MODELS.items():
+            model_schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+            for def_name, definition in model_schema.pop("$defs", {}).items():
+                components.setdefault(def_name, definition)
+            components[name] = model_schema
+        app.openapi_schema = schema
+        return schema
+
+    app.openapi = custom_openapi
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Literal
 
-from app.services.mapper_service import DiagramMapper
 from app.services.github_service import GitHubService
 from app.services.startleft_service import StartleftService
 from app.services.analysis_service import AnalysisService
+from app.services.mapper_service import EngineDiagramMapper
+from app.services.export_service import ExportService
+from app.services.diagram_stream import read_diagram_request
+from app.core.compression import json_response
+from app.api.openapi import streamed_body
 from app.domain.otm.schema import OTMProject
 from app.domain.analysis.schema import AnalysisReport
 from app.domain.analysis.rule_schema import RuleDefinition, AnalysisRequest
@@ -38,71 +44,102 @@ class GitHubFileRequest(BaseModel):
     message: Optional[str] = "Update via Threat Model Platform"
 
 # --- Endpoints ---
-@router.post("/parse", response_model=OTMProject)
-async def parse_diagram(payload: DiagramExportRequest):
+@router.post("/parse", response_model=OTMProject, openapi_extra=streamed_body(DiagramExportRequest))
+async def parse_diagram(request: Request):
     """
     Receives a raw diagram, parses it into OTM, and returns the structured model.
     Used for validation before saving.
+    Body: DiagramExportRequest (optionally gzip / zstd encoded).
     """
+    payload, mapper = await read_diagram_request(request, DiagramExportRequest)
     try:
-        otm_model = DiagramMapper.to_otm(
-            project_id=payload.projectId,
-            project_name=payload.projectName,
-            nodes=payload.nodes,
-            edges=payload.edges
-        )
-        return otm_model
+        otm_model = mapper.build(payload.projectId, payload.projectName)
+        return json_response(otm_model.model_dump_json(by_alias=True).encode("utf-8"), request)
     except Exception as e:
         # Log the specific error for debugging
         print(f"Mapping Error: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Failed to map diagram to OTM: {str(e)}")
 
-@router.post("/analyze", response_model=AnalysisReport)
-async def analyze_diagram(payload: AnalysisRequest):
+@router.post("/analyze", response_model=AnalysisReport, openapi_extra=streamed_body(AnalysisRequest))
+async def analyze_diagram(request: Request):
     """
     Parses the diagram into OTM and runs the threat analysis engine.
     Now supports custom rules.
+    Body: AnalysisRequest (optionally gzip / zstd encoded).
     """
+    payload, mapper = await read_diagram_request(request, AnalysisRequest, mapper_cls=EngineDiagramMapper)
     try:
-        # 1. Map to OTM
-        otm_model = DiagramMapper.to_otm(
-            project_id=payload.projectId,
-            project_name=payload.projectName,
-            nodes=payload.nodes,
-            edges=payload.edges
-        )
+        # 1. Map straight to the engine model (no OTMProject needed for analysis)
+        engine_model = mapper.build(payload.projectId, payload.projectName)
         
         # 2. Run Analysis
-        report = AnalysisService.analyze(otm_model, custom_rules=payload.customRules)
-        return report
+        # Off the event loop: large analyses run for seconds (possibly on the process pool)
+        report = await run_in_threadpool(AnalysisService.analyze, engine_model, custom_rules=payload.customRules)
+        return json_response(report.model_dump_json().encode("utf-8"), request)
     except Exception as e:
         print(f"Analysis Error: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Failed to analyze diagram: {str(e)}")
 
-@router.post("/save-to-github")
-async def save_to_github(payload: GitHubSaveRequest):
+@router.post("/save-to-github", openapi_extra=streamed_body(GitHubSaveRequest))
+async def save_to_github(request: Request):
     """
     Converts the diagram to OTM and pushes it to the configured GitHub repository.
+    Body: GitHubSaveRequest (optionally gzip / zstd encoded).
     """
+    payload, mapper = await read_diagram_request(request, GitHubSaveRequest)
     try:
         # 1. Map to OTM
-        otm_model = DiagramMapper.to_otm(
-            project_id=payload.projectId,
-            project_name=payload.projectName,
-            nodes=payload.nodes,
-            edges=payload.edges
-        )
+        otm_model = mapper.build(payload.projectId, payload.projectName)
         
-        # 2. Serialize OTM
-        otm_json = otm_model.model_dump_json(indent=2, by_alias=True)
+        # 2. Serialize OTM (streamed, in the format implied by the filename)
+        otm_chunks = ExportService.otm(otm_model, ExportService.otm_format_for(payload.filename), indent=2)
         
         # 3. Push to GitHub
-        result = github_service.save_otm(payload.filename, otm_json, payload.commitMessage)
+        result = github_service.save_otm(payload.filename, otm_chunks, payload.commitMessage)
         return result
     except Exception as e:
         print(f"GitHub Save Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to save to GitHub: {str(e)}")
 
+@router.post("/export/otm", openapi_extra=streamed_body(DiagramExportRequest))
+async def export_otm(request: Request, format: Literal["json", "yaml"] = "json"):
+    """
+    Converts the diagram to OTM and streams it back as a JSON or YAML file.
+    Body: DiagramExportRequest (optionally gzip / zstd encoded).
+    """
+    payload, mapper = await read_diagram_request(request, DiagramExportRequest)
+    try:
+        otm_model = mapper.build(payload.projectId, payload.projectName)
+    except Exception as e:
+        print(f"Mapping Error: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Failed to map diagram to OTM: {str(e)}")
+
+    return StreamingResponse(
+        ExportService.encode(ExportService.otm(otm_model, format, indent=2)),
+        media_type=ExportService.MEDIA_TYPES[format],
+        headers={"Content-Disposition": ExportService.content_disposition(f"{payload.projectId}.otm.{format}")}
+    )
+
+@router.post("/export/sarif", openapi_extra=streamed_body(AnalysisRequest))
+async def export_sarif(request: Request):
+    """
+    Runs the threat analysis engine and streams the findings as a SARIF 2.1.0 log.
+    Body: AnalysisRequest (optionally gzip / zstd encoded).
+    """
+    payload, mapper = await read_diagram_request(request, AnalysisRequest, mapper_cls=EngineDiagramMapper)
+    try:
+        engine_model = mapper.build(payload.projectId, payload.projectName)
+        report = await run_in_threadpool(AnalysisService.analyze, engine_model, custom_rules=payload.customRules)
+    except Exception as e:
+        print(f"Analysis Error: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Failed to analyze diagram: {str(e)}")
+
+    return StreamingResponse(
+        ExportService.encode(ExportService.sarif(report)),
+        media_type=ExportService.MEDIA_TYPES["sarif"],
+        headers={"Content-Disposition": ExportService.content_disposition(f"{payload.projectId}.sarif")}
+    )
+
 @router.post("/import-iac", response_model=OTMProject)
 async def import_iac(payload: IaCImportRequest):
     """
@@ -0,0 +1,192 @@
+import hashlib
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import List, Dict, Any, Optional, Literal
+
+from app.adapters.project_store import ProjectStore, get_project_store
+from app.api.openapi import streamed_body
+from app.core.compression import json_response
+from app.services.github_service import GitHubService
+from app.services.diagram_stream import read_diagram_request
+from app.services.analysis_service import AnalysisService
+from app.services.rules.catalog import CATALOG_VERSION
+from app.services.rules.model import EngineProject
+from app.services.export_service import ExportService
+from app.domain.otm.schema import OTMProject
+from app.domain.analysis.schema import AnalysisReport
+from app.domain.analysis.rule_schema import RuleDefinition
+
+router = APIRouter()
+# Initialize services
+github_service = GitHubService()
+
+# --- Request Models ---
+class ProjectSaveRequest(BaseModel):
+    projectName: str
+    nodes: List[Dict[str, Any]]  # Raw React Flow Nodes
+    edges: List[Dict[str, Any]]  # Raw React Flow Edges
+
+class ProjectAnalyzeRequest(BaseModel):
+    revision: Optional[int] = None  # Defaults to the latest revision
+    customRules: Optional[List[RuleDefinition]] = None
+
+class ProjectGitHubSaveRequest(BaseModel):
+    revision: Optional[int] = None
+    commitMessage: str = "Update OTM Model"
+    filename: str = "threat-model.otm"
+
+# --- Helpers ---
+def _rules_key(custom_rules: Optional[List[RuleDefinition]] = None) -> str:
+    """
+    Fingerprint of the rules a report was produced with, used to key stored reports:
+    the built-in catalog version, then a hash of the custom rule set (if any).
+    """
+    if not custom_rules:
+        return f"{CATALOG_VERSION}:"
+    canonical = json.dumps([r.model_dump() for r in custom_rules], sort_keys=True)
+    return f"{CATALOG_VERSION}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+def _load_project(project_store: ProjectStore, project_id: str, revision: Optional[int]):
+    stored = project_store.get_project(project_id, revision)
+    if stored is None:
+        detail = f"Project '{project_id}' not found" if revision is None else \
+            f"Project '{project_id}' revision {revision} not found"
+        raise HTTPException(status_code=404, detail=detail)
+    return stored
+
+# --- Endpoints ---
+@router.post("/{project_id}/revisions", openapi_extra=streamed_body(ProjectSaveRequest))
+async def save_project(project_id: str, request: Request,
+                       project_store: ProjectStore = Depends(get_project_store)):
+    """
+    Parses a raw diagram into OTM and stores it as the next revision of the project.
+    Subsequent parse/analyze/save calls can then reference the project by id.
+    Body: ProjectSaveRequest (optionally gzip / zstd encoded).
+    """
+    payload, mapper = await read_diagram_request(request, ProjectSaveRequest)
+
+    def build_and_store() -> int:
+        # Model building and the SQLite write both block, keep them off the event loop
+        try:
+            otm_model = mapper.build(project_id, payload.projectName)
+        except Exception as e:
+            print(f"Mapping Error: {str(e)}")
+            raise HTTPException(status_code=400, detail=f"Failed to map diagram to OTM: {str(e)}")
+        return project_store.save_project(otm_model)
+
+    revision = await run_in_threadpool(build_and_store)
+    return {"projectId": project_id, "revision": revision}
+
+@router.get("/{project_id}", response_model=OTMProject)
+def get_project(project_id: str, request: Request, revision: Optional[int] = None,
+                project_store: ProjectStore = Depends(get_project_store)):
+    """
+    Returns the stored OTM model for the given (or latest) revision.
+    """
+    _, otm_model = _load_project(project_store, project_id, revision)
+    return json_response(otm_model.model_dump_json(by_alias=True).encode("utf-8"), request)
+
+@router.post("/{project_id}/analyze", response_model=AnalysisReport)
+def analyze_project(project_id: str, payload: ProjectAnalyzeRequest, request: Request,
+                    project_store: ProjectStore = Depends(get_project_store)):
+    """
+    Runs the threat analysis engine on a stored project revision.
+    A report already stored for the same revision and rule set is served without recomputation.
+    """
+    revision = payload.revision if payload.revision is not None else project_store.latest_revision(project_id)
+    if revision is None:
+        raise HTTPException(status_code=404, detail=f"Project '{project_id}' not found")
+
+    rules_key = _rules_key(payload.customRules)
+    cached = project_store.get_report_json(project_id, revision, rules_key)
+    if cached is not None:
+        return json_response(cached.encode("utf-8"), request)
+
+    # Convert without keeping the pydantic project alive during analysis
+    engine_model = EngineProject.from_otm(_load_project(project_store, project_id, revision)[1])
+    try:
+        report = AnalysisService.analyze(engine_model, custom_rules=payload.customRules)
+    except Exception as e:
+        print(f"Analysis Error: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Failed to analyze project: {str(e)}")
+
+    report_json = project_store.save_report(project_id, revision, report, rules_key)
+    return json_response(report_json.encode("utf-8"), request)
+
+@router.get("/{project_id}/report", response_model=AnalysisReport)
+def get_report(project_id: str, request: Request, revision: Optional[int] = None,
+               project_store: ProjectStore = Depends(get_project_store)):
+    """
+    Returns the most recently stored analysis report (built with the current rule catalog)
+    for the given (or latest) revision.
+    """
+    if revision is None:
+        revision = project_store.latest_revision(project_id)
+    report_json = project_store.get_report_json(project_id, revision, key_prefix=_rules_key()) \
+        if revision is not None else None
+    if report_json is None:
+        raise HTTPException(status_code=404, detail=f"No stored report for project '{project_id}'")
+    return json_response(report_json.encode("utf-8"), request)
+
+@router.post("/{project_id}/save-to-github")
+def save_project_to_github(project_id: str, payload: ProjectGitHubSaveRequest,
+                           project_store: ProjectStore = Depends(get_project_store)):
+    """
+    Pushes a stored project revision to the configured GitHub repository.
+    """
+    _, otm_model = _load_project(project_store, project_id, payload.revision)
+    try:
+        otm_chunks = ExportService.otm(otm_model, ExportService.otm_format_for(payload.filename), indent=2)
+        return github_service.save_otm(payload.filename, otm_chunks, payload.commitMessage)
+    except Exception as e:
+        print(f"GitHub Save Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to save to GitHub: {str(e)}")
+
+@router.get("/{project_id}/export/otm")
+def export_project_otm(project_id: str, format: Literal["json", "yaml"] = "json", revision: Optional[int] = None,
+                       project_store: ProjectStore = Depends(get_project_store)):
+    """
+    Streams a stored project revision as an OTM JSON or YAML file.
+    """
+    revision, otm_model = _load_project(project_store, project_id, revision)
+    return StreamingResponse(
+        ExportService.encode(ExportService.otm(otm_model, format, indent=2)),
+        media_type=ExportService.MEDIA_TYPES[format],
+        headers={"Content-Disposition": ExportService.content_disposition(f"{project_id}-r{revision}.otm.{format}")}
+    )
+
+@router.get("/{project_id}/export/sarif")
+def export_project_sarif(project_id: str, revision: Optional[int] = None,
+                         project_store: ProjectStore = Depends(get_project_store)):
+    """
+    Streams the findings for a stored project revision as a SARIF 2.1.0 log.
+    Uses the most recently stored report built with the current rule catalog, analyzing
+    the revision first if none exists.
+    """
+    if revision is None:
+        revision = project_store.latest_revision(project_id)
+    if revision is None:
+        raise HTTPException(status_code=404, detail=f"Project '{project_id}' not found")
+
+    report_json = project_store.get_report_json(project_id, revision, key_prefix=_rules_key())
+    if report_json is not None:
+        # Stream straight from the stored JSON instead of re-validating the whole report
+        chunks = ExportService.sarif_from_json(report_json, project_id)
+    else:
+        engine_model = EngineProject.from_otm(_load_project(project_store, project_id, revision)[1])
+        try:
+            report = AnalysisService.analyze(engine_model)
+        except Exception as e:
+            print(f"Analysis Error: {str(e)}")
+            raise HTTPException(status_code=400, detail=f"Failed to analyze project: {str(e)}")
+        project_store.save_report(project_id, revision, report, _rules_key())
+        chunks = ExportService.sarif(report)
+
+    return StreamingResponse(
+        ExportService.encode(chunks),
+        media_type=ExportService.MEDIA_TYPES["sarif"],
+        headers={"Content-Disposition": ExportService.content_disposition(f"{project_id}-r{revision}.sarif")}
+    )
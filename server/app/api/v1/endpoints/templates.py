@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, Request
+from typing import Optional
+
+from app.core.compression import encoded_response
+from app.services.template_service import TemplateCatalog
+
+router = APIRouter()
+# Loaded and indexed once at startup; reloads itself when template files change
+template_catalog = TemplateCatalog()
+
+# --- Endpoints ---
+@router.get("")
+def list_templates(request: Request):
+    """
+    Lists the available template files with entry counts and ETags.
+    """
+    return encoded_response(template_catalog.manifest(), request)
+
+@router.get("/files/{filename}")
+def get_template_file(filename: str, request: Request):
+    """
+    Returns a template file exactly as stored (pre-compressed, ETag-validated).
+    """
+    body = template_catalog.file(filename)
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"Template file '{filename}' not found")
+    return encoded_response(body, request)
+
+@router.get("/stencils")
+def get_stencils(request: Request, provider: Optional[str] = None,
+                 otmType: Optional[str] = None, tag: Optional[str] = None):
+    """
+    Returns component / trust zone stencils, optionally filtered by provider, otmType and tag.
+    """
+    body = template_catalog.query("stencil", provider=provider, otmType=otmType, tag=tag)
+    return encoded_response(body, request)
+
+@router.get("/rules")
+def get_rule_templates(request: Request, provider: Optional[str] = None,
+                       severity: Optional[str] = None, target: Optional[str] = None):
+    """
+    Returns rule templates, optionally filtered by provider, severity and target.
+    """
+    body = template_catalog.query("rule", provider=provider, severity=severity, target=target)
+    return encoded_response(body, request)
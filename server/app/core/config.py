@@ -4,6 +4,24 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Threat Model API"
     GITHUB_TOKEN: str = ""
     GITHUB_REPO: str = ""
+
+    # Analysis engine: models with at least this many entities are analyzed
+    # on a process pool (0 disables parallel execution). Off by default: threats are
+    # built in the API process, which bounds the speedup for the built-in rule set;
+    # enable it for expensive custom rules on multi-core hosts.
+    ANALYSIS_PARALLEL_MIN_ENTITIES: int = 0
+    ANALYSIS_MAX_WORKERS: int = 0  # 0 = os.cpu_count()
+    ANALYSIS_SHARD_SIZE: int = 5000
+
+    # Local SQLite store for projects and analysis reports
+    PROJECT_STORE_PATH: str = "data/projects.db"
+
+    # Stencil / rule template catalog (defaults to the repository 'templates/' directory)
+    TEMPLATES_DIR: str = ""
+    TEMPLATES_RELOAD_INTERVAL: float = 2.0  # seconds between file change checks
+
+    # Upper bound on decoded (decompressed) diagram upload size
+    MAX_REQUEST_BODY_BYTES: int = 256 * 1024 * 1024
     
     class Config:
         env_file = ".env"
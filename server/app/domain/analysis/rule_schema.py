@@ -1,12 +1,46 @@
+import re
 from typing import List, Literal, Optional, Any, Union, Dict
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 # --- Rule Definition Schema ---
 
+GROUP_OPERATORS = ("any", "all", "not")
+NUMERIC_OPERATORS = ("gt", "lt", "gte", "lte")
+
 class RuleCriteria(BaseModel):
-    field: str = Field(..., description="Field to check (e.g., 'type', 'attributes.encrypted')")
-    operator: Literal["equals", "not_equals", "contains", "not_contains", "missing", "exists"] = "equals"
+    field: Optional[str] = Field(None, description="Field to check (e.g., 'type', 'attributes.encrypted'). Not used by groups.")
+    operator: Literal[
+        "equals", "not_equals", "contains", "not_contains", "missing", "exists",
+        "in", "not_in", "matches", "gt", "lt", "gte", "lte",
+        "any", "all", "not"
+    ] = "equals"
     value: Optional[Any] = None
+    criteria: Optional[List["RuleCriteria"]] = Field(
+        None, description="Nested criteria for 'any' / 'all' / 'not' groups"
+    )
+
+    @model_validator(mode="after")
+    def check_operands(self):
+        if self.operator in GROUP_OPERATORS:
+            if not self.criteria:
+                raise ValueError(f"'{self.operator}' group requires nested criteria")
+            return self
+        if not self.field:
+            raise ValueError(f"'{self.operator}' criterion requires a field")
+        if self.operator in ("in", "not_in") and not isinstance(self.value, list):
+            raise ValueError(f"'{self.operator}' requires a list value")
+        if self.operator == "matches":
+            if not isinstance(self.value, str) or not self.value:
+                raise ValueError("'matches' requires a non-empty regex string")
+            try:
+                re.compile(self.value)
+            except re.error as e:
+                raise ValueError(f"Invalid regex for 'matches': {e}")
+        if self.operator in NUMERIC_OPERATORS and (
+            isinstance(self.value, bool) or not isinstance(self.value, (int, float))
+        ):
+            raise ValueError(f"'{self.operator}' requires a numeric value")
+        return self
 
 class RuleDefinition(BaseModel):
     id: str
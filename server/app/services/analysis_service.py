@@ -1,14 +1,22 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
 from app.domain.otm.schema import OTMProject
 from app.domain.analysis.schema import AnalysisReport, Threat
 from app.domain.analysis.rule_schema import RuleDefinition
 from app.services.rules.catalog import ACTIVE_RULES, GenericRule
+from app.services.rules.model import EngineProject
+from app.services.rules.parallel import resolve_workers, run_rules, run_rules_parallel
+from app.core.config import settings
 
 class AnalysisService:
     @staticmethod
-    def analyze(project: OTMProject, custom_rules: Optional[List[RuleDefinition]] = None) -> AnalysisReport:
-        all_threats: List[Threat] = []
+    def analyze(project: Union[OTMProject, EngineProject], custom_rules: Optional[List[RuleDefinition]] = None) -> AnalysisReport:
+        """
+        Runs all rules against `project`. Callers that only need the report should pass an
+        EngineProject (see EngineDiagramMapper) so no pydantic copy is kept during analysis.
+        """
+        # Rules operate on the slotted engine model, not pydantic
+        model = project if isinstance(project, EngineProject) else EngineProject.from_otm(project)
         
         # Start with active hardcoded rules
         rules_to_run = list(ACTIVE_RULES)
@@ -21,13 +29,17 @@ class AnalysisService:
                 except Exception as e:
                     print(f"Failed to instantiate custom rule {rule_def.id}: {e}")
 
-        for rule in rules_to_run:
-            try:
-                threats = rule.check(project)
-                all_threats.extend(threats)
-            except Exception as e:
-                print(f"Error running rule {rule.id}: {e}")
-                # Continue with other rules
+        all_threats: List[Threat]
+        threshold = settings.ANALYSIS_PARALLEL_MIN_ENTITIES
+        if threshold and model.size >= threshold and resolve_workers(settings.ANALYSIS_MAX_WORKERS) > 1:
+            # Large models: spread rules / entity shards across a process pool
+            all_threats = run_rules_parallel(
+                model, rules_to_run,
+                max_workers=settings.ANALYSIS_MAX_WORKERS,
+                shard_size=settings.ANALYSIS_SHARD_SIZE
+            )
+        else:
+            all_threats = run_rules(model, rules_to_run)
         
         # Calculate summary
         summary = {
@@ -39,7 +51,7 @@ class AnalysisService:
         }
 
         return AnalysisReport(
-            projectId=project.project.get("id", "unknown"),
+            projectId=model.id,
             timestamp=datetime.utcnow().isoformat(),
             threats=all_threats,
             summary=summary
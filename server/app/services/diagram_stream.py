@@ -0,0 +1,190 @@
+import codecs
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, List, Tuple, Type, TypeVar
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from app.core.config import settings
+from app.core.compression import iter_request_body
+from app.services.mapper_service import DiagramMapper
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+_STREAMED_ARRAYS = ("nodes", "edges")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+# A value ending in one of these is complete even if the buffer ends right after it
+_CLOSERS = frozenset('}]"')
+
+# Parser states
+_START, _KEY_OR_END, _KEY, _COLON, _VALUE, _ITEM_OR_END, _ITEM, _ITEM_SEP, _VALUE_SEP, _DONE = range(10)
+
+
+class _Incomplete(Exception):
+    """The buffer ends inside the next value; more input is needed."""
+
+
+class DiagramStreamParser:
+    """
+    Incremental parser for a diagram upload (a top-level JSON object).
+    Each element of the `nodes` / `edges` arrays is decoded on its own with the stdlib C
+    scanner and handed to its handler; every other top-level value is decoded whole and
+    kept in `meta`. Only the top-level structure is walked in Python, so parsing costs
+    about as much as `json.loads` without ever holding the raw arrays.
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[[Any], None]]):
+        self.handlers = handlers
+        self.meta: Dict[str, Any] = {}
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pending: List[str] = []
+        self._pending_size = 0
+        self._state = _START
+        self._key = None
+        # Unparsed length to wait for before re-decoding a value that was incomplete,
+        # so a value spanning many chunks is re-scanned O(log n) times, not per chunk
+        self._retry_at = 0
+
+    def feed(self, data: bytes) -> None:
+        text = self._text.decode(data)
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if len(self._buffer) + self._pending_size >= self._retry_at:
+            self._run(final=False)
+
+    def close(self) -> Dict[str, Any]:
+        self._pending.append(self._text.decode(b"", final=True))
+        self._run(final=True)
+        if self._state != _DONE:
+            raise ValueError("Unexpected end of JSON body")
+        return self.meta
+
+    def _decode(self, buffer: str, pos: int, final: bool) -> Tuple[Any, int]:
+        try:
+            value, end = _DECODER.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            raise _Incomplete()
+        if end == len(buffer) and not final and buffer[end - 1] not in _CLOSERS:
+            # A number / literal at the end of the buffer may continue in the next chunk
+            raise _Incomplete()
+        return value, end
+
+    def _run(self, final: bool) -> None:
+        buffer = self._buffer + "".join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+        size = len(buffer)
+        state = self._state
+        handler = self.handlers.get(self._key)
+        pos = 0
+        try:
+            while True:
+                pos = _WHITESPACE.match(buffer, pos).end()
+                if pos == size:
+                    break
+                char = buffer[pos]
+
+                if state == _ITEM_SEP:
+                    if char == ",":
+                        state = _ITEM
+                        pos += 1
+                    elif char == "]":
+                        state = _VALUE_SEP
+                        pos += 1
+                    else:
+                        raise ValueError(f"Expected ',' or ']' at offset {pos}")
+                elif state == _ITEM or state == _ITEM_OR_END:
+                    if char == "]" and state == _ITEM_OR_END:
+                        state = _VALUE_SEP
+                        pos += 1
+                        continue
+                    item, pos = self._decode(buffer, pos, final)
+                    handler(item)
+                    state = _ITEM_SEP
+                elif state == _VALUE_SEP:
+                    if char == ",":
+                        state = _KEY
+                    elif char == "}":
+                        state = _DONE
+                    else:
+                        raise ValueError(f"Expected ',' or '}}' at offset {pos}")
+                    pos += 1
+                elif state == _KEY or state == _KEY_OR_END:
+                    if char == "}" and state == _KEY_OR_END:
+                        state = _DONE
+                        pos += 1
+                        continue
+                    if char != '"':
+                        raise ValueError(f"Expected a property name at offset {pos}")
+                    self._key, pos = self._decode(buffer, pos, final)
+                    handler = self.handlers.get(self._key)
+                    state = _COLON
+                elif state == _COLON:
+                    if char != ":":
+                        raise ValueError(f"Expected ':' at offset {pos}")
+                    state = _VALUE
+                    pos += 1
+                elif state == _VALUE:
+                    if handler is not None and char == "[":
+                        self.meta[self._key] = []
+                        state = _ITEM_OR_END
+                        pos += 1
+                    else:
+                        self.meta[self._key], pos = self._decode(buffer, pos, final)
+                        state = _VALUE_SEP
+                elif state == _START:
+                    if char != "{":
+                        raise ValueError("Request body must be a JSON object")
+                    state = _KEY_OR_END
+                    pos += 1
+                else:
+                    raise ValueError(f"Extra data at offset {pos}")
+            self._retry_at = 0
+        except _Incomplete:
+            self._retry_at = 2 * (size - pos)
+        self._state = state
+        self._buffer = buffer[pos:]
+
+
+async def _parse_incremental(request: Request, mapper: DiagramMapper) -> Dict[str, Any]:
+    """
+    Feeds the decoded body to a DiagramStreamParser chunk by chunk. Parsing and mapping
+    run in the thread pool, so the event loop only moves bytes.
+    """
+    parser = DiagramStreamParser({"nodes": mapper.add_node, "edges": mapper.add_edge})
+    async for chunk in iter_request_body(request, settings.MAX_REQUEST_BODY_BYTES):
+        await run_in_threadpool(parser.feed, chunk)
+    return await run_in_threadpool(parser.close)
+
+
+async def read_diagram_request(request: Request, model: Type[T],
+                               mapper_cls: Type[DiagramMapper] = DiagramMapper) -> Tuple[T, DiagramMapper]:
+    """
+    Reads a (optionally gzip / zstd encoded) diagram upload.
+    Nodes and edges are mapped while the body is parsed; the remaining fields are
+    validated against `model` (with empty `nodes` / `edges`).
+    Pass `mapper_cls=EngineDiagramMapper` when only the analysis engine model is needed.
+    Returns the validated request model and the populated mapper.
+    """
+    mapper = mapper_cls()
+    try:
+        meta = await _parse_incremental(request, mapper)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Diagram Parse Error: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Failed to parse diagram: {str(e)}")
+
+    try:
+        payload = model.model_validate(meta)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    return payload, mapper
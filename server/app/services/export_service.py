@@ -0,0 +1,209 @@
+import json
+import re
+import yaml
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from urllib.parse import quote
+from pydantic import BaseModel
+from app.domain.otm.schema import OTMProject
+from app.domain.analysis.schema import AnalysisReport, Threat
+
+try:
+    import ijson  # Optional: lets stored reports be exported without loading them as models
+except ImportError:
+    ijson = None
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_VERSION = "2.1.0"
+TOOL_NAME = "Threat Model Platform"
+
+# SARIF result level and GitHub code scanning 'security-severity' per threat severity
+_SARIF_LEVELS = {"critical": "error", "high": "error", "medium": "warning", "low": "note"}
+_SECURITY_SEVERITY = {"critical": "9.5", "high": "8.0", "medium": "5.5", "low": "2.0"}
+
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def _to_jsonable(entity: Any) -> Any:
+    if isinstance(entity, BaseModel):
+        return entity.model_dump(mode="json", by_alias=True)
+    return entity
+
+
+def _dump_json(entity: Any, indent: Optional[int]) -> str:
+    if isinstance(entity, BaseModel):
+        return entity.model_dump_json(indent=indent, by_alias=True)
+    separators = None if indent else (",", ":")
+    return json.dumps(entity, indent=indent, separators=separators, ensure_ascii=False)
+
+
+def _indent_block(text: str, prefix: str) -> str:
+    """Indents every line after the first (the first follows a key or list marker)"""
+    return text.replace("\n", "\n" + prefix)
+
+
+class ExportService:
+    """
+    Generator-based writers for OTM (JSON / YAML) and SARIF.
+    Output is produced one entity at a time, so memory stays proportional to a single
+    entity rather than to the serialized document.
+    """
+    MEDIA_TYPES = {
+        "json": "application/json",
+        "yaml": "application/yaml",
+        "sarif": "application/sarif+json",
+    }
+
+    # --- OTM ---
+
+    @staticmethod
+    def otm_json(project: OTMProject, indent: Optional[int] = None) -> Iterator[str]:
+        """Yields the same document as `project.model_dump_json(indent=..., by_alias=True)`"""
+        nl = "\n" if indent else ""
+        pad = " " * (indent or 0)
+        key_sep = ": " if indent else ":"
+
+        yield "{" + nl
+        first = True
+        for key in OTMProject.model_fields:
+            value = getattr(project, key)
+            prefix = ("" if first else "," + nl) + pad + json.dumps(key) + key_sep
+            first = False
+            if not isinstance(value, list):
+                yield prefix + _indent_block(_dump_json(value, indent), pad)
+                continue
+            if not value:
+                yield prefix + "[]"
+                continue
+            yield prefix + "[" + nl
+            for index, entity in enumerate(value):
+                item = pad * 2 + _indent_block(_dump_json(entity, indent), pad * 2)
+                yield item if index == 0 else "," + nl + item
+            yield nl + pad + "]"
+        yield nl + "}"
+
+    @staticmethod
+    def otm_yaml(project: OTMProject) -> Iterator[str]:
+        for key in OTMProject.model_fields:
+            value = getattr(project, key)
+            if not isinstance(value, list):
+                yield yaml.safe_dump({key: _to_jsonable(value)}, sort_keys=False)
+                continue
+            if not value:
+                yield f"{key}: []\n"
+                continue
+            yield f"{key}:\n"
+            for entity in value:
+                # A one-item list renders as "- ..." at column 0, valid under the key above
+                yield yaml.safe_dump([_to_jsonable(entity)], sort_keys=False)
+
+    @staticmethod
+    def otm(project: OTMProject, fmt: str = "json", indent: Optional[int] = None) -> Iterator[str]:
+        if fmt == "yaml":
+            return ExportService.otm_yaml(project)
+        if fmt == "json":
+            return ExportService.otm_json(project, indent=indent)
+        raise ValueError(f"Unsupported OTM export format '{fmt}'")
+
+    @staticmethod
+    def otm_format_for(filename: str) -> str:
+        return "yaml" if filename.lower().endswith((".yaml", ".yml")) else "json"
+
+    # --- SARIF ---
+
+    @staticmethod
+    def _sarif_rule(threat: Threat) -> Dict[str, Any]:
+        rule = {
+            "id": threat.ruleId,
+            "name": threat.ruleId,
+            "shortDescription": {"text": threat.title},
+            "defaultConfiguration": {"level": _SARIF_LEVELS.get(threat.severity, "warning")},
+            "properties": {
+                "security-severity": _SECURITY_SEVERITY.get(threat.severity, "5.5"),
+                "tags": ["security", "threat-model"],
+            },
+        }
+        if threat.mitigation:
+            rule["help"] = {"text": threat.mitigation}
+        return rule
+
+    @staticmethod
+    def _sarif_result(threat: Threat, artifact_uri: str) -> Dict[str, Any]:
+        location: Dict[str, Any] = {
+            "physicalLocation": {
+                "artifactLocation": {"uri": artifact_uri},
+                "region": {"startLine": 1},
+            }
+        }
+        if threat.componentId:
+            location["logicalLocations"] = [
+                {"fullyQualifiedName": threat.componentId, "kind": "resource"}
+            ]
+        return {
+            "ruleId": threat.ruleId,
+            "level": _SARIF_LEVELS.get(threat.severity, "warning"),
+            "message": {"text": threat.description},
+            "locations": [location],
+            "partialFingerprints": {"threatModel/v1": f"{threat.ruleId}:{threat.componentId or ''}"},
+            "properties": {"severity": threat.severity, "status": threat.status},
+        }
+
+    @staticmethod
+    def _sarif_log(project_id: str, threats: Callable[[], Iterable[Threat]], artifact_uri: str) -> Iterator[str]:
+        """`threats` is called twice: once to collect rule descriptors, once for the results"""
+        rules: Dict[str, Dict[str, Any]] = {}
+        for threat in threats():
+            if threat.ruleId not in rules:
+                rules[threat.ruleId] = ExportService._sarif_rule(threat)
+
+        driver = {"name": TOOL_NAME, "rules": list(rules.values())}
+        yield (
+            '{"$schema":' + json.dumps(SARIF_SCHEMA)
+            + ',"version":' + json.dumps(SARIF_VERSION)
+            + ',"runs":[{"tool":{"driver":' + json.dumps(driver, separators=(",", ":")) + "}"
+            + ',"automationDetails":{"id":' + json.dumps(f"threat-model/{project_id}/") + "}"
+            + ',"results":['
+        )
+        for index, threat in enumerate(threats()):
+            result = json.dumps(ExportService._sarif_result(threat, artifact_uri), separators=(",", ":"))
+            yield result if index == 0 else "," + result
+        yield "]}]}"
+
+    @staticmethod
+    def sarif(report: AnalysisReport, artifact_uri: str = "threat-model.otm") -> Iterator[str]:
+        """
+        Yields a SARIF 2.1.0 log for `report`, one result at a time.
+        Rule descriptors are collected in a first pass (one per distinct rule id).
+        """
+        return ExportService._sarif_log(report.projectId, lambda: report.threats, artifact_uri)
+
+    @staticmethod
+    def sarif_from_json(report_json: str, project_id: str, artifact_uri: str = "threat-model.otm") -> Iterator[str]:
+        """
+        Same as `sarif`, for a serialized AnalysisReport (e.g. one loaded from the project store).
+        Threats are parsed one at a time, so no AnalysisReport is built for the whole report.
+        """
+        if ijson is None:
+            return ExportService.sarif(AnalysisReport.model_validate_json(report_json), artifact_uri)
+        data = report_json.encode("utf-8")
+
+        def threats() -> Iterator[Threat]:
+            for item in ijson.items(data, "threats.item", use_float=True):
+                yield Threat.model_validate(item)
+
+        return ExportService._sarif_log(project_id, threats, artifact_uri)
+
+    # --- Helpers ---
+
+    @staticmethod
+    def content_disposition(filename: str) -> str:
+        """
+        Attachment header value safe for any filename: an ASCII `filename` fallback
+        plus the exact name as RFC 5987 `filename*`.
+        """
+        fallback = _UNSAFE_FILENAME_CHARS.sub("_", filename)
+        return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+    @staticmethod
+    def encode(chunks: Iterable[str]) -> Iterator[bytes]:
+        for chunk in chunks:
+            yield chunk.encode("utf-8")
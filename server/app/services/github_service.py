@@ -1,4 +1,5 @@
 from github import Github, GithubException
+from typing import Iterable, Union
 from app.core.config import settings
 import logging
 
@@ -24,12 +25,17 @@ class GitHubService:
             raise Exception("GitHub Repository not configured")
         return client.get_repo(name)
 
-    def save_otm(self, filename: str, content: str, message: str = "Update OTM"):
+    def save_otm(self, filename: str, content: Union[str, Iterable[str]], message: str = "Update OTM"):
         """
         Saves or updates a file in the default configured repository (Env vars).
+        `content` may be a string or the chunks of a streaming export writer.
         """
         if not self.client:
             raise Exception("Server-side GitHub Token not configured")
+
+        if not isinstance(content, str):
+            # The contents API takes the whole file in one request, so chunks are joined once here
+            content = "".join(content)
             
         repo = self._get_repo_obj(self.client)
         try:
@@ -1,89 +1,112 @@
-from typing import List, Dict, Any
+from typing import Iterable, List, Dict, Any
 import logging
 from app.domain.otm.schema import OTMProject, TrustZone, Component, DataFlow, TrustRating
+from app.services.rules.model import (
+    EngineProject, EngineTrustZone, EngineComponent, EngineDataFlow, EngineRating
+)
 
 logger = logging.getLogger(__name__)
 
 class DiagramMapper:
     """
     Translates raw React Flow JSON export into a structured OTM Project.
+    Nodes and edges can be fed one at a time (`add_node` / `add_edge`), so a
+    streaming parser never has to materialize the whole raw payload.
     """
 
-    @staticmethod
-    def to_otm(project_id: str, project_name: str, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> OTMProject:
-        
-        trust_zones = []
-        components = []
-        dataflows = []
+    def __init__(self):
+        self.trust_zones: List[TrustZone] = []
+        self.components: List[Component] = []
+        self.dataflows: List[DataFlow] = []
 
-        # 1. Process Nodes
+    @staticmethod
+    def to_otm(project_id: str, project_name: str, nodes: Iterable[Dict[str, Any]], edges: Iterable[Dict[str, Any]]) -> OTMProject:
+        mapper = DiagramMapper()
         for node in nodes:
-            # React Flow Data
-            node_id = node.get("id")
-            node_type = node.get("type")
-            data = node.get("data", {})
-            parent_id = node.get("parentNode", None) # React Flow nesting
-
-            # Basic Label Fallback
-            label = data.get("label", "Unnamed Entity")
-
-            if node_type == "otmTrustZone":
-                # Map to Trust Zone
-                # Default risk if not provided by UI
-                risk_data = data.get("risk", {"confidentiality": 10, "integrity": 10, "availability": 10})
-                
-                tz = TrustZone(
-                    id=node_id,
-                    name=label,
-                    description=data.get("description"),
-                    risk=TrustRating(**risk_data),
-                    attributes=data.get("attributes", {})
-                )
-                trust_zones.append(tz)
-
-            elif node_type == "otmComponent":
-                # Map to Component
-                # Ensure we have a valid OTM component type (default to 'generic-client' if missing)
-                comp_type = data.get("otmType", "generic-client")
-                
-                # If no parent is drawn in UI, default to a root TrustZone (e.g., "Internet") or handle error
-                # For resilience, we map generic parents if missing
-                final_parent = parent_id if parent_id else "default-trust-zone"
-
-                comp = Component(
-                    id=node_id,
-                    name=label,
-                    type=comp_type,
-                    parent=final_parent,
-                    tags=data.get("tags", []),
-                    attributes=data.get("attributes", {})
-                )
-                components.append(comp)
-
-        # 2. Process Edges (DataFlows)
+            mapper.add_node(node)
         for edge in edges:
-            edge_id = edge.get("id")
-            source = edge.get("source")
-            target = edge.get("target")
-            data = edge.get("data", {})
+            mapper.add_edge(edge)
+        return mapper.build(project_id, project_name)
+
+    def add_node(self, node: Dict[str, Any]) -> None:
+        """Maps a single React Flow node to a TrustZone or Component."""
+        # React Flow Data
+        node_id = node.get("id")
+        node_type = node.get("type")
+        data = node.get("data", {})
+        parent_id = node.get("parentNode", None) # React Flow nesting
+
+        # Basic Label Fallback
+        label = data.get("label", "Unnamed Entity")
+
+        if node_type == "otmTrustZone":
+            # Map to Trust Zone
+            # Default risk if not provided by UI
+            risk_data = data.get("risk", {"confidentiality": 10, "integrity": 10, "availability": 10})
+
+            tz = TrustZone(
+                id=node_id,
+                name=label,
+                description=data.get("description"),
+                risk=TrustRating(**risk_data),
+                attributes=data.get("attributes", {})
+            )
+            self._add_trust_zone(tz)
 
-            # React Flow puts label at root, but sometimes we might store it in data
-            label = edge.get("label") or data.get("label") or f"Flow {source} -> {target}"
+        elif node_type == "otmComponent":
+            # Map to Component
+            # Ensure we have a valid OTM component type (default to 'generic-client' if missing)
+            comp_type = data.get("otmType", "generic-client")
 
-            df = DataFlow(
-                id=edge_id,
+            # If no parent is drawn in UI, default to a root TrustZone (e.g., "Internet") or handle error
+            # For resilience, we map generic parents if missing
+            final_parent = parent_id if parent_id else "default-trust-zone"
+
+            comp = Component(
+                id=node_id,
                 name=label,
-                source=source,
-                destination=target,
-                bidirectional=data.get("bidirectional", False),
+                type=comp_type,
+                parent=final_parent,
+                tags=data.get("tags", []),
                 attributes=data.get("attributes", {})
             )
-            dataflows.append(df)
+            self._add_component(comp)
+
+    def add_edge(self, edge: Dict[str, Any]) -> None:
+        """Maps a single React Flow edge to a DataFlow."""
+        edge_id = edge.get("id")
+        source = edge.get("source")
+        target = edge.get("target")
+        data = edge.get("data", {})
+
+        # React Flow puts label at root, but sometimes we might store it in data
+        label = edge.get("label") or data.get("label") or f"Flow {source} -> {target}"
+
+        df = DataFlow(
+            id=edge_id,
+            name=label,
+            source=source,
+            destination=target,
+            bidirectional=data.get("bidirectional", False),
+            attributes=data.get("attributes", {})
+        )
+        self._add_dataflow(df)
 
-        # 3. Construct Final OTM
+    # Sinks for validated entities; EngineDiagramMapper overrides these
+    def _add_trust_zone(self, tz: TrustZone) -> None:
+        self.trust_zones.append(tz)
+
+    def _add_component(self, comp: Component) -> None:
+        self.components.append(comp)
+
+    def _add_dataflow(self, df: DataFlow) -> None:
+        self.dataflows.append(df)
+
+    def build(self, project_id: str, project_name: str) -> OTMProject:
+        # Construct Final OTM
         # Add a default trust zone if orphans exist (optional safety net)
-        if not any(tz.id == "default-trust-zone" for tz in trust_zones):
-             trust_zones.append(TrustZone(
+        if not any(tz.id == "default-trust-zone" for tz in self.trust_zones):
+             self.trust_zones.append(TrustZone(
                  id="default-trust-zone", 
                  name="Default Zone", 
                  risk=TrustRating(confidentiality=0, integrity=0, availability=0)
@@ -92,7 +115,40 @@ class DiagramMapper:
         return OTMProject(
             otmVersion="0.1.0",
             project={"id": project_id, "name": project_name},
-            trustZones=trust_zones,
-            components=components,
-            dataflows=dataflows
+            trustZones=self.trust_zones,
+            components=self.components,
+            dataflows=self.dataflows
+        )
+
+
+class EngineDiagramMapper(DiagramMapper):
+    """
+    Maps a diagram straight into the analysis engine model.
+    Each entity is still validated through its pydantic model, but only the slotted
+    engine object is kept, so no OTMProject is alive while rules run.
+    """
+
+    def _add_trust_zone(self, tz: TrustZone) -> None:
+        self.trust_zones.append(EngineTrustZone.from_otm(tz))
+
+    def _add_component(self, comp: Component) -> None:
+        self.components.append(EngineComponent.from_otm(comp))
+
+    def _add_dataflow(self, df: DataFlow) -> None:
+        self.dataflows.append(EngineDataFlow.from_otm(df))
+
+    def build(self, project_id: str, project_name: str) -> EngineProject:
+        # Same safety net as DiagramMapper.build
+        if not any(tz.id == "default-trust-zone" for tz in self.trust_zones):
+            self.trust_zones.append(EngineTrustZone(
+                "default-trust-zone", "Default Zone", None, [], {},
+                risk=EngineRating(0, 0, 0)
+            ))
+
+        return EngineProject(
+            id=project_id,
+            name=project_name,
+            trust_zones=self.trust_zones,
+            components=self.components,
+            dataflows=self.dataflows
         )
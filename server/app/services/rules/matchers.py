@@ -0,0 +1,160 @@
+import re
+from typing import Any, Callable, List, Sequence, Tuple
+from app.domain.analysis.rule_schema import RuleCriteria
+
+# --- Precompiled Criteria Matchers ---
+# Each RuleCriteria is compiled once per rule into a closure. Field paths are split,
+# `in` sets hashed and regexes compiled up front, so evaluation does no parsing.
+
+Matcher = Callable[[Any], bool]
+
+# Relative evaluation cost, used to order siblings so cheap checks short-circuit first
+_COST = {
+    "missing": 0, "exists": 0, "equals": 1, "not_equals": 1,
+    "in": 2, "not_in": 2, "gt": 2, "lt": 2, "gte": 2, "lte": 2,
+    "contains": 3, "not_contains": 3, "matches": 4,
+}
+_GROUP_COST = 5
+
+
+def get_field_value(obj: Any, path: Tuple[str, ...]) -> Any:
+    """Resolves a pre-split path like ('attributes', 'encrypted')"""
+    current = obj
+    for part in path:
+        if isinstance(current, dict):
+            current = current.get(part)
+        elif hasattr(current, part):
+            current = getattr(current, part)
+        else:
+            return None
+    return current
+
+
+def _cost(crit: RuleCriteria) -> int:
+    if crit.criteria is not None and crit.operator in ("any", "all", "not"):
+        return _GROUP_COST + sum(_cost(c) for c in crit.criteria)
+    return _COST.get(crit.operator, _GROUP_COST)
+
+
+def _ordered(criteria: Sequence[RuleCriteria]) -> List[RuleCriteria]:
+    # sorted() is stable, so equal-cost criteria keep their authored order
+    return sorted(criteria, key=_cost)
+
+
+def _to_number(val: Any):
+    if isinstance(val, bool) or val is None:
+        return None
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return None
+
+
+def _compile_membership(path: Tuple[str, ...], values: list, negate: bool) -> Matcher:
+    try:
+        lookup = frozenset(values)
+    except TypeError:
+        # Unhashable members (e.g. dicts) fall back to a linear scan
+        lookup = values
+
+    def member(val: Any) -> bool:
+        if isinstance(val, (list, tuple, set, frozenset)):
+            # Collections (e.g. tags) match if any element is in the set
+            return any(_safe_in(v, lookup) for v in val)
+        return _safe_in(val, lookup)
+
+    if negate:
+        return lambda obj: not member(get_field_value(obj, path))
+    return lambda obj: member(get_field_value(obj, path))
+
+
+def _safe_in(val: Any, lookup) -> bool:
+    try:
+        return val in lookup
+    except TypeError:
+        return False
+
+
+def _compile_leaf(crit: RuleCriteria) -> Matcher:
+    path = tuple(crit.field.split('.'))
+    op = crit.operator
+    expected = crit.value
+
+    if op == "equals":
+        if isinstance(expected, bool):
+            # specific check for boolean strings
+            expected_str = str(expected).lower()
+
+            def equals_bool(obj: Any) -> bool:
+                val = get_field_value(obj, path)
+                if isinstance(val, str):
+                    return val.lower() == expected_str
+                return val == expected
+            return equals_bool
+        return lambda obj: get_field_value(obj, path) == expected
+    if op == "not_equals":
+        return lambda obj: get_field_value(obj, path) != expected
+    if op == "contains":
+        def contains(obj: Any) -> bool:
+            val = get_field_value(obj, path)
+            return bool(val) and expected in val
+        return contains
+    if op == "not_contains":
+        def not_contains(obj: Any) -> bool:
+            val = get_field_value(obj, path)
+            return not (val and expected in val)
+        return not_contains
+    if op == "missing":
+        def missing(obj: Any) -> bool:
+            val = get_field_value(obj, path)
+            return val is None or val == ""
+        return missing
+    if op == "exists":
+        def exists(obj: Any) -> bool:
+            val = get_field_value(obj, path)
+            return val is not None and val != ""
+        return exists
+    if op in ("in", "not_in"):
+        return _compile_membership(path, list(expected or []), negate=(op == "not_in"))
+    if op == "matches":
+        pattern = re.compile(expected)
+
+        def matches(obj: Any) -> bool:
+            val = get_field_value(obj, path)
+            return val is not None and pattern.search(str(val)) is not None
+        return matches
+    if op in ("gt", "lt", "gte", "lte"):
+        bound = float(expected)
+        compare = {
+            "gt": lambda n: n > bound,
+            "lt": lambda n: n < bound,
+            "gte": lambda n: n >= bound,
+            "lte": lambda n: n <= bound,
+        }[op]
+
+        def numeric(obj: Any) -> bool:
+            number = _to_number(get_field_value(obj, path))
+            return number is not None and compare(number)
+        return numeric
+
+    raise ValueError(f"Unsupported operator '{op}'")
+
+
+def compile_criterion(crit: RuleCriteria) -> Matcher:
+    if crit.operator == "all":
+        return compile_all(crit.criteria)
+    if crit.operator == "any":
+        matchers = [compile_criterion(c) for c in _ordered(crit.criteria)]
+        return lambda obj: any(m(obj) for m in matchers)
+    if crit.operator == "not":
+        inner = compile_all(crit.criteria)
+        return lambda obj: not inner(obj)
+    return _compile_leaf(crit)
+
+
+def compile_all(criteria: Sequence[RuleCriteria]) -> Matcher:
+    """Compiles a list of criteria that must ALL match (the top-level rule semantics)"""
+    matchers = [compile_criterion(c) for c in _ordered(criteria)]
+    if len(matchers) == 1:
+        return matchers[0]
+    return lambda obj: all(m(obj) for m in matchers)
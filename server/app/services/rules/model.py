@@ -0,0 +1,121 @@
+from sys import intern
+from typing import Any, Dict, List, Optional, Union
+from app.domain.otm.schema import OTMProject, TrustZone, Component, DataFlow
+
+# --- Internal Engine Model ---
+# Pydantic models stay at the API boundary. The analysis engine works on these
+# slotted objects, which reuse the validated values (attribute dicts, tag lists)
+# instead of copying them. They are built straight from the mapper on the analysis
+# path, or converted once from an OTMProject.
+
+def _case_insensitive(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns `attributes` itself unless some key changes case when lowercased; otherwise
+    a copy with lowercased, interned keys, so every entity shares one string per key.
+    (Keys already in lowercase are shared as-is: the JSON decoder memoizes them.)
+    """
+    for key in attributes:
+        if not isinstance(key, str) or key != key.lower():
+            return {intern(str(k).lower()): v for k, v in attributes.items()}
+    return attributes
+
+
+class EngineRating:
+    __slots__ = ("confidentiality", "integrity", "availability")
+
+    def __init__(self, confidentiality: int, integrity: int, availability: int):
+        self.confidentiality = confidentiality
+        self.integrity = integrity
+        self.availability = availability
+
+
+class EngineEntity:
+    __slots__ = ("id", "name", "description", "tags", "attributes", "attributes_ci")
+
+    def __init__(self, id: str, name: str, description: Optional[str], tags: List[str], attributes: Dict[str, Any]):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.tags = tags
+        self.attributes = attributes
+        self.attributes_ci = _case_insensitive(attributes) if attributes else attributes
+
+
+class EngineTrustZone(EngineEntity):
+    __slots__ = ("type", "risk")
+
+    def __init__(self, id, name, description, tags, attributes, risk: EngineRating):
+        EngineEntity.__init__(self, id, name, description, tags, attributes)
+        self.type = "trust-zone"
+        self.risk = risk
+
+    @classmethod
+    def from_otm(cls, tz: TrustZone) -> "EngineTrustZone":
+        risk = tz.risk
+        return cls(tz.id, tz.name, tz.description, tz.tags, tz.attributes,
+                   risk=EngineRating(risk.confidentiality, risk.integrity, risk.availability))
+
+
+class EngineComponent(EngineEntity):
+    __slots__ = ("type", "parent")
+
+    def __init__(self, id, name, description, tags, attributes, type: str, parent: str):
+        EngineEntity.__init__(self, id, name, description, tags, attributes)
+        self.type = intern(type)
+        self.parent = parent
+
+    @classmethod
+    def from_otm(cls, comp: Component) -> "EngineComponent":
+        return cls(comp.id, comp.name, comp.description, comp.tags, comp.attributes,
+                   type=comp.type, parent=comp.parent)
+
+
+class EngineDataFlow(EngineEntity):
+    __slots__ = ("source", "destination", "bidirectional")
+
+    def __init__(self, id, name, description, tags, attributes, source: str, destination: str, bidirectional: bool):
+        EngineEntity.__init__(self, id, name, description, tags, attributes)
+        self.source = source
+        self.destination = destination
+        self.bidirectional = bidirectional
+
+    @classmethod
+    def from_otm(cls, df: Union[DataFlow, Dict[str, Any]]) -> "EngineDataFlow":
+        if isinstance(df, dict):
+            # OTMProject.dataflows may also hold raw dicts
+            return cls(df.get("id"), df.get("name"), df.get("description"), df.get("tags") or [],
+                       df.get("attributes") or {}, source=df.get("source"),
+                       destination=df.get("destination"), bidirectional=bool(df.get("bidirectional", False)))
+        return cls(df.id, df.name, df.description, df.tags, df.attributes,
+                   source=df.source, destination=df.destination, bidirectional=df.bidirectional)
+
+
+class EngineProject:
+    """
+    Compact view of a project that all catalog rules operate on.
+    Built by `EngineDiagramMapper` or once via `from_otm`, so rules never touch
+    pydantic models directly.
+    """
+    __slots__ = ("id", "name", "trustZones", "components", "dataflows")
+
+    def __init__(self, id: str, name: str, trust_zones: List[EngineTrustZone],
+                 components: List[EngineComponent], dataflows: List[EngineDataFlow]):
+        self.id = id
+        self.name = name
+        self.trustZones = trust_zones
+        self.components = components
+        self.dataflows = dataflows
+
+    @property
+    def size(self) -> int:
+        return len(self.trustZones) + len(self.components) + len(self.dataflows)
+
+    @classmethod
+    def from_otm(cls, project: OTMProject) -> "EngineProject":
+        return cls(
+            id=project.project.get("id", "unknown"),
+            name=project.project.get("name", ""),
+            trust_zones=[EngineTrustZone.from_otm(tz) for tz in project.trustZones],
+            components=[EngineComponent.from_otm(comp) for comp in project.components],
+            dataflows=[EngineDataFlow.from_otm(df) for df in project.dataflows]
+        )
@@ -0,0 +1,241 @@
+import logging
+import os
+import pickle
+import threading
+from collections import Counter
+from functools import lru_cache
+from operator import itemgetter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_all_start_methods, get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.domain.analysis.schema import Threat
+from app.services.rules.catalog import FieldPath, ThreatRule
+from app.services.rules.model import EngineProject
+
+logger = logging.getLogger(__name__)
+
+# --- Parallel Rule Execution ---
+# The parent extracts only the entity fields the sharded rules read, one column per
+# (target, field path), pickles each column per shard and packs them into a single
+# multiprocessing.shared_memory block. A task carries the rule, its shard bounds and
+# the offsets of the columns it needs; the worker zips them into lightweight rows, evaluates
+# `rule.matches` and returns the matching entity indices. Threats are built once, in
+# the parent, from the real entities. Workers keep no state between tasks.
+# The pool is long-lived and started via forkserver (spawn where unavailable), never
+# fork, since the API process is multi-threaded.
+
+ColumnRef = Tuple[FieldPath, int, int]  # (field path, offset, length) in the shared block
+Task = Tuple[str, ThreatRule, int, int, Tuple[ColumnRef, ...]]
+
+_SHM_DIR = "/dev/shm"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def resolve_workers(max_workers: int = 0) -> int:
+    return max_workers or os.cpu_count() or 1
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            method = "forkserver" if "forkserver" in get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context(method))
+            _pool_workers = workers
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _shardable(rule: ThreatRule) -> bool:
+    return rule.target in ("component", "trustZone") and type(rule).matches is not ThreatRule.matches
+
+
+def _covering_paths(paths) -> List[FieldPath]:
+    """Drops paths already covered by a shorter prefix (its column holds the whole sub-value)"""
+    kept: List[FieldPath] = []
+    for path in sorted(set(paths), key=len):
+        if not any(path[:len(prefix)] == prefix for prefix in kept):
+            kept.append(path)
+    return kept
+
+
+def _column(entities: Sequence[Any], path: FieldPath) -> list:
+    """Resolves `path` for every entity, with the same semantics as matchers.get_field_value"""
+    values = [getattr(entity, path[0], None) for entity in entities]
+    for part in path[1:]:
+        values = [v.get(part) if isinstance(v, dict) else getattr(v, part, None) for v in values]
+    return values
+
+
+@lru_cache(maxsize=None)
+def _row_type(keys: Tuple[str, ...]) -> type:
+    """
+    Tuple subclass standing in for an engine entity (or a dict inside one): each key is
+    a read-only attribute and `get` mirrors dict.get, so rules and
+    matchers.get_field_value read rows exactly like the real objects.
+    """
+    fields = {key: property(itemgetter(position)) for position, key in enumerate(keys)}
+    return type("Row", (tuple,), {"__slots__": (), "get": _row_get, **fields})
+
+
+def _row_get(row: tuple, key: str, default: Any = None) -> Any:
+    return getattr(row, key, default)
+
+
+def _build_rows(columns: List[Tuple[FieldPath, list]], count: int) -> list:
+    """Zips columns into rows; multi-part paths become nested rows (e.g. row.risk.integrity)"""
+    children: Dict[str, List[Tuple[FieldPath, list]]] = {}
+    for path, values in columns:
+        children.setdefault(path[0], []).append((path[1:], values))
+    row_type = _row_type(tuple(children))
+    if not children:
+        return [row_type() for _ in range(count)]
+    # Covering paths guarantee a leaf never shares its key with deeper paths
+    values = [parts[0][1] if not parts[0][0] else _build_rows(parts, count) for parts in children.values()]
+    return list(map(row_type, zip(*values)))
+
+
+def _run_task(task: Task) -> List[int]:
+    name, rule, start, stop, column_refs = task
+    shm = SharedMemory(name=name)
+    try:
+        columns = [(path, pickle.loads(shm.buf[offset:offset + length])) for path, offset, length in column_refs]
+    finally:
+        shm.close()
+
+    rows = _build_rows(columns, stop - start)
+    try:
+        return [start + i for i, row in enumerate(rows) if rule.matches(row)]
+    except Exception as e:
+        print(f"Error running rule {rule.id}: {e}")
+        return []
+
+
+def _pack_columns(model: EngineProject, rules: Sequence[ThreatRule], shard_size: int):
+    """
+    Returns (blobs, planned): pickled column shards and, per shardable rule and shard,
+    (rule index, rule, start, stop, [(path, blob index)]), in rule then shard order.
+    """
+    wanted: Dict[str, List[FieldPath]] = {}
+    for rule in rules:
+        if _shardable(rule):
+            wanted.setdefault(rule.target, []).extend(rule.fields)
+
+    blobs: List[bytes] = []
+    planned = []
+    for target, paths in wanted.items():
+        entities = model.components if target == "component" else model.trustZones
+        covering = _covering_paths(paths)
+        shard_index: Dict[Tuple[FieldPath, int], int] = {}
+        for path in covering:
+            values = _column(entities, path)
+            for start in range(0, len(entities), shard_size):
+                shard_index[(path, start)] = len(blobs)
+                blobs.append(pickle.dumps(values[start:start + shard_size], protocol=pickle.HIGHEST_PROTOCOL))
+        for index, rule in enumerate(rules):
+            if rule.target != target or not _shardable(rule):
+                continue
+            rule_paths = [p for p in covering if any(f[:len(p)] == p for f in rule.fields)]
+            for start in range(0, len(entities), shard_size):
+                planned.append((index, rule, start, min(start + shard_size, len(entities)),
+                                [(p, shard_index[(p, start)]) for p in rule_paths]))
+    planned.sort(key=lambda entry: (entry[0], entry[2]))
+    return blobs, planned
+
+
+def _shm_has_room(size: int) -> bool:
+    # Writing past a full /dev/shm raises SIGBUS rather than an error, so check first
+    if not os.path.isdir(_SHM_DIR):
+        return True
+    stat = os.statvfs(_SHM_DIR)
+    return stat.f_bavail * stat.f_frsize > size
+
+
+def run_rules(model: EngineProject, rules: Sequence[ThreatRule]) -> List[Threat]:
+    """Runs `rules` sequentially in the current thread"""
+    threats: List[Threat] = []
+    for rule in rules:
+        try:
+            threats.extend(rule.check(model))
+        except Exception as e:
+            print(f"Error running rule {rule.id}: {e}")
+            # Continue with other rules
+    return threats
+
+
+def run_rules_parallel(model: EngineProject, rules: Sequence[ThreatRule],
+                       max_workers: int = 0, shard_size: int = 5000) -> List[Threat]:
+    """
+    Evaluates the per-entity rules on the shared process pool while the calling thread
+    builds threats from finished shards and runs whole-model rules. Threats are assembled
+    in rule order, then entity order, so the output matches `run_rules`. Falls back to
+    `run_rules` when there is only one worker or one task, or when the column snapshot
+    does not fit in shared memory.
+    """
+    workers = resolve_workers(max_workers)
+    if workers <= 1:
+        return run_rules(model, rules)
+    blobs, planned = _pack_columns(model, rules, max(1, shard_size))
+    if len(planned) <= 1:
+        return run_rules(model, rules)
+
+    size = sum(len(blob) for blob in blobs)
+    if not _shm_has_room(size):
+        logger.warning(f"Analysis snapshot ({size} bytes) does not fit in {_SHM_DIR}, running rules in-process")
+        return run_rules(model, rules)
+    try:
+        shm = SharedMemory(create=True, size=max(1, size))
+    except OSError as e:
+        logger.warning(f"Could not allocate shared memory for analysis ({e}), running rules in-process")
+        return run_rules(model, rules)
+
+    try:
+        offsets = []
+        position = 0
+        for blob in blobs:
+            shm.buf[position:position + len(blob)] = blob
+            offsets.append((position, len(blob)))
+            position += len(blob)
+        del blobs
+
+        tasks: List[Task] = [
+            (shm.name, rule, start, stop, tuple((path,) + offsets[blob] for path, blob in refs))
+            for _, rule, start, stop, refs in planned
+        ]
+        shard_counts = Counter(entry[0] for entry in planned)
+        pool = _get_pool(workers)
+        threats: List[Threat] = []
+        try:
+            # map() submits every task up front; threats are built here as results arrive
+            results = pool.map(_run_task, tasks)
+            for index, rule in enumerate(rules):
+                if not _shardable(rule):
+                    threats.extend(run_rules(model, [rule]))
+                    continue
+                matched = [next(results) for _ in range(shard_counts[index])]
+                entities = rule.targets(model)
+                try:
+                    threats.extend([rule.threat_for(entities[i]) for indices in matched for i in indices])
+                except Exception as e:
+                    print(f"Error running rule {rule.id}: {e}")
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            raise
+        return threats
+    finally:
+        shm.close()
+        shm.unlink()
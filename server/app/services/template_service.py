@@ -0,0 +1,205 @@
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.compression import BROTLI_DYNAMIC_QUALITY, BROTLI_STATIC_QUALITY, EncodedBody
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATES_DIR = Path(__file__).resolve().parents[3] / "templates"
+_QUERY_CACHE_SIZE = 256
+# Provider names recognised in entry tags and template file name prefixes
+KNOWN_PROVIDERS = frozenset({"aws", "azure", "gcp"})
+
+
+def _encode(data: Any) -> EncodedBody:
+    return EncodedBody(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+
+def _file_provider(path: Path) -> Optional[str]:
+    """The provider a template file is dedicated to ("azure_components.json"), if its prefix names one"""
+    prefix = path.stem.split("_")[0].lower()
+    return prefix if prefix in KNOWN_PROVIDERS else None
+
+
+def resolve_provider(entry: Dict[str, Any], default: Optional[str] = None) -> Optional[str]:
+    """
+    The entry's explicit "provider" field; without one, the first provider among its own
+    tags, then the provider of its file. Criteria are never inspected: a rule that matches
+    azure-tagged components is not itself an azure rule unless it says so.
+    """
+    explicit = entry.get("provider")
+    if isinstance(explicit, str) and explicit:
+        return explicit.lower()
+    default_data = entry.get("defaultData") or {}
+    for tag in list(entry.get("tags") or []) + list(default_data.get("tags") or []):
+        if isinstance(tag, str) and tag.lower() in KNOWN_PROVIDERS:
+            return tag.lower()
+    return default
+
+
+class _CatalogSnapshot:
+    """Immutable, fully indexed view of the template directory at one point in time."""
+
+    def __init__(self, signature: tuple):
+        self.signature = signature
+        self.files: Dict[str, EncodedBody] = {}
+        self.stencils: List[Dict[str, Any]] = []
+        self.rules: List[Dict[str, Any]] = []
+        # (kind, key) -> value -> positions in self.stencils / self.rules
+        self.index: Dict[Tuple[str, str], Dict[str, List[int]]] = {}
+        self.query_cache: Dict[tuple, EncodedBody] = {}
+        self.manifest: Optional[EncodedBody] = None
+
+    def add_to_index(self, kind: str, key: str, value: Any, position: int):
+        if value is None or value == "":
+            return
+        self.index.setdefault((kind, key), {}).setdefault(str(value).lower(), []).append(position)
+
+
+class TemplateCatalog:
+    """
+    Loads every template file (stencils and rules) once, indexes entries by
+    provider, otmType and tag, and serves them as pre-encoded bodies.
+    Files are re-read only when their mtime/size change.
+    """
+
+    def __init__(self, directory: str = None, reload_interval: float = None):
+        self.directory = Path(directory or settings.TEMPLATES_DIR or DEFAULT_TEMPLATES_DIR)
+        self.reload_interval = settings.TEMPLATES_RELOAD_INTERVAL if reload_interval is None else reload_interval
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        # Startup pays for maximum compression of the files; reloads happen on a request thread
+        self._snapshot = self._load(self._signature(), BROTLI_STATIC_QUALITY)
+
+    # --- Loading ---
+
+    def _signature(self) -> tuple:
+        if not self.directory.is_dir():
+            return ()
+        entries = []
+        for path in sorted(self.directory.glob("*.json")):
+            stat = path.stat()
+            entries.append((path.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+    def _load(self, signature: tuple, quality: int = BROTLI_DYNAMIC_QUALITY) -> _CatalogSnapshot:
+        snapshot = _CatalogSnapshot(signature)
+        manifest = []
+        for name, _, _ in signature:
+            path = self.directory / name
+            try:
+                raw = path.read_bytes()
+                entries = json.loads(raw)
+            except (OSError, ValueError) as e:
+                logger.error(f"Skipping template file {name}: {e}")
+                continue
+            if not isinstance(entries, list):
+                logger.error(f"Skipping template file {name}: expected a JSON array")
+                continue
+
+            default_provider = _file_provider(path)
+            providers = set()
+            stencil_count = rule_count = 0
+            for entry in entries:
+                if not isinstance(entry, dict):
+                    continue
+                provider = resolve_provider(entry, default_provider)
+                if provider:
+                    providers.add(provider)
+                if "criteria" in entry:
+                    self._index_rule(snapshot, entry, provider)
+                    rule_count += 1
+                else:
+                    self._index_stencil(snapshot, entry, provider)
+                    stencil_count += 1
+
+            body = EncodedBody(raw, quality)
+            snapshot.files[name] = body
+            manifest.append({
+                "file": name,
+                "provider": default_provider,
+                "providers": sorted(providers),
+                "stencils": stencil_count,
+                "rules": rule_count,
+                "etag": body.etag(),
+            })
+
+        snapshot.manifest = _encode({"files": manifest})
+        logger.info(f"Loaded {len(snapshot.stencils)} stencils and {len(snapshot.rules)} rules from {self.directory}")
+        return snapshot
+
+    @staticmethod
+    def _index_stencil(snapshot: _CatalogSnapshot, entry: Dict[str, Any], provider: str):
+        position = len(snapshot.stencils)
+        snapshot.stencils.append(entry)
+        default_data = entry.get("defaultData") or {}
+        snapshot.add_to_index("stencil", "provider", provider, position)
+        snapshot.add_to_index("stencil", "otmType", entry.get("otmType") or default_data.get("otmType"), position)
+        for tag in set(entry.get("tags") or []) | set(default_data.get("tags") or []):
+            snapshot.add_to_index("stencil", "tag", tag, position)
+
+    @staticmethod
+    def _index_rule(snapshot: _CatalogSnapshot, entry: Dict[str, Any], provider: str):
+        position = len(snapshot.rules)
+        snapshot.rules.append(entry)
+        snapshot.add_to_index("rule", "provider", provider, position)
+        snapshot.add_to_index("rule", "severity", entry.get("severity"), position)
+        snapshot.add_to_index("rule", "target", entry.get("target", "component"), position)
+
+    def _current(self) -> _CatalogSnapshot:
+        """Returns the current snapshot, reloading first if files changed since the last check"""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return self._snapshot
+        with self._lock:
+            # Only the thread that claims the check reloads; the others keep serving the current snapshot
+            if now - self._last_check < self.reload_interval:
+                return self._snapshot
+            self._last_check = now
+        signature = self._signature()
+        if signature != self._snapshot.signature:
+            logger.info("Template files changed, reloading catalog")
+            self._snapshot = self._load(signature)
+        return self._snapshot
+
+    # --- Queries ---
+
+    def manifest(self) -> EncodedBody:
+        return self._current().manifest
+
+    def file(self, name: str) -> Optional[EncodedBody]:
+        return self._current().files.get(name)
+
+    def query(self, kind: str, **filters: Optional[str]) -> EncodedBody:
+        """
+        Returns the entries of `kind` ("stencil" / "rule") matching all given filters
+        (case-insensitive). Results are served from the index and cached per snapshot.
+        """
+        snapshot = self._current()
+        active = tuple(sorted((k, v.lower()) for k, v in filters.items() if v))
+        cache_key = (kind,) + active
+        cached = snapshot.query_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        entries = snapshot.stencils if kind == "stencil" else snapshot.rules
+        positions = None
+        for key, value in active:
+            matched = snapshot.index.get((kind, key), {}).get(value, [])
+            positions = set(matched) if positions is None else positions & set(matched)
+            if not positions:
+                break
+        if positions is None:
+            result = entries
+        else:
+            result = [entries[i] for i in sorted(positions)]
+
+        body = _encode(result)
+        if len(snapshot.query_cache) >= _QUERY_CACHE_SIZE:
+            snapshot.query_cache.clear()
+        snapshot.query_cache[cache_key] = body
+        return body
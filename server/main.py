@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.api import api_router
+from app.api.openapi import install_openapi
 
 
 app = FastAPI(title=settings.PROJECT_NAME)
@@ -23,6 +24,7 @@ app.add_middleware(
 )
 
 app.include_router(api_router, prefix="/api/v1")
+install_openapi(app)
 
 
 @app.get("/health")